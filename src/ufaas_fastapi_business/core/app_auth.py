@@ -1,17 +1,32 @@
+import functools
 import hashlib
 import hmac
-from datetime import datetime
+import time
 
 from aiocache import cached
-from fastapi_mongo_base.utils.aionetwork import aio_request
 from pydantic import BaseModel, field_validator
 
+from .utils import aio_request, single_flight
+
 try:
     from server.config import Settings
 except ImportError:
     from .config import Settings
 
 
+@functools.lru_cache(maxsize=64)
+def _scopes_digest(scopes: tuple[str, ...]) -> str:
+    # keyed on the scopes themselves, so a copied or mutated AppAuth never
+    # reuses a digest computed for other scopes
+    return hashlib.sha256("".join(scopes).encode()).hexdigest()
+
+
+def _secret_digest(hash_key_part: str, app_secret: bytes | str) -> str:
+    key = hashlib.sha256(hash_key_part.encode())
+    key.update(app_secret if isinstance(app_secret, bytes) else app_secret.encode())
+    return key.hexdigest()
+
+
 class AppAuth(BaseModel):
     # app_secret: str
     app_id: str
@@ -22,40 +37,38 @@ class AppAuth(BaseModel):
 
     @field_validator("timestamp")
     def check_timestamp(cls, v: int):
-        if datetime.now().timestamp() - v > 60:
+        if time.time() - v > 60:
             raise ValueError("Timestamp expired.")
         return v
 
     @property
     def hash_key_part(self):
-        scopes_hash = hashlib.sha256("".join(self.scopes).encode()).hexdigest()
+        scopes_hash = _scopes_digest(tuple(self.scopes))
         return f"{self.app_id}{scopes_hash}{self.timestamp}{self.sso_url}"
 
     def check_secret(self, app_secret: bytes | str):
-        if type(app_secret) != str:
-            app_secret = app_secret.decode("utf-8")
-
-        key = f"{self.hash_key_part}{app_secret}"
         return hmac.compare_digest(
-            self.secret, hashlib.sha256(key.encode()).hexdigest()
+            self.secret, _secret_digest(self.hash_key_part, app_secret)
         )
 
     def get_secret(self, app_secret: bytes | str):
-        if type(app_secret) != str:
-            app_secret = app_secret.decode("utf-8")
+        return _secret_digest(self.hash_key_part, app_secret)
+
 
-        key = f"{self.hash_key_part}{app_secret}"
-        return hashlib.sha256(key.encode()).hexdigest()
+def _access_token_key(func, app_id, app_secret, business_sso_url, scopes):
+    # the secret is left out so it is never kept in memory as part of a key
+    return f"{func.__name__}:{app_id}:{business_sso_url}:{','.join(scopes)}"
 
 
-@cached(ttl=10 * 60)
+@cached(ttl=10 * 60, key_builder=_access_token_key)
+@single_flight(key_builder=_access_token_key)
 async def get_access_token(
     app_id: str, app_secret, business_sso_url: str, scopes: list[str]
 ):
     app_auth = AppAuth(
         app_id=app_id,
         scopes=scopes,
-        timestamp=datetime.now().timestamp(),
+        timestamp=time.time(),
         sso_url=business_sso_url,
     )
     app_auth.secret = app_auth.get_secret(app_secret)
@@ -19,3 +19,7 @@ class Settings(BaseSettings):
     app_secret: str = os.getenv("APP_SECRET")
     app_scopes: str = os.getenv("APP_SCOPES", default="[]")
     app_auth_expiry: int = 60  # 1 minute
+    # optional: share access tokens between workers (needs the redis extra)
+    token_cache_redis_uri: str | None = os.getenv("UFAAS_TOKEN_CACHE_REDIS_URI")
+    # serve a pyinstrument report for `?profile=1` (needs the profiling extra)
+    PROFILING: bool = os.getenv("PROFILING", "false").lower() == "true"
@@ -0,0 +1,50 @@
+from urllib.parse import parse_qs
+
+from starlette.responses import HTMLResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+try:
+    from server.config import Settings
+except ImportError:
+    from .config import Settings
+
+
+class ProfilerMiddleware:
+    """Return a pyinstrument HTML report instead of the response for `?profile=1`.
+
+    Only active when `Settings.PROFILING` is true and pyinstrument is
+    installed; otherwise requests are passed straight to the app.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.enabled = Profiler is not None and bool(
+            getattr(Settings, "PROFILING", False)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            not self.enabled
+            or scope["type"] != "http"
+            or parse_qs(scope.get("query_string", b"").decode()).get("profile") != ["1"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def discard(message: Message):
+            pass
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        response = HTMLResponse(profiler.output_html())
+        await response(scope, receive, send)
@@ -0,0 +1,164 @@
+import asyncio
+import functools
+import logging
+import time
+import weakref
+
+import httpx
+import jwt
+from fastapi_mongo_base.utils.aionetwork import aio_request_client
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    Redis = None
+
+try:
+    from server.config import Settings
+except ImportError:
+    from .config import Settings
+
+# one client per event loop, dropped together with its loop
+_http_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_token_redis: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+# the token cache is best-effort: give up on an unreachable redis quickly
+_TOKEN_REDIS_TIMEOUT = 0.5
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the client shared by outbound calls on the running event loop.
+
+    A client is bound to the loop that created it, so each loop gets its own
+    and scripts calling `asyncio.run` more than once keep working.
+    """
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _http_clients[loop] = httpx.AsyncClient()
+    return client
+
+
+async def close_http_client():
+    """Close the running loop's client; register it as a shutdown hook."""
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def aio_request(*, method: str = "get", url: str = None, **kwargs) -> dict:
+    return await aio_request_client(get_http_client(), method=method, url=url, **kwargs)
+
+
+def single_flight(key_builder):
+    """Let concurrent calls with the same key share one in-flight call."""
+
+    def decorator(func):
+        inflight: dict[str, asyncio.Future] = {}
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = key_builder(func, *args, **kwargs)
+            future = inflight.get(key)
+            if future is None:
+                future = asyncio.ensure_future(func(*args, **kwargs))
+                inflight[key] = future
+                future.add_done_callback(lambda _: inflight.pop(key, None))
+            # shield so one cancelled caller does not cancel the shared call
+            return await asyncio.shield(future)
+
+        return wrapper
+
+    return decorator
+
+
+def token_expiry(token: str) -> float | None:
+    try:
+        return jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return None
+
+
+def get_token_redis() -> "Redis | None":
+    """Return the Redis client shared by workers for access tokens, if configured."""
+    redis_uri = getattr(Settings, "token_cache_redis_uri", None)
+    if Redis is None or not redis_uri:
+        return None
+    # like the http client, a redis connection pool is bound to its loop
+    loop = asyncio.get_running_loop()
+    if loop not in _token_redis:
+        _token_redis[loop] = Redis.from_url(
+            redis_uri,
+            socket_connect_timeout=_TOKEN_REDIS_TIMEOUT,
+            socket_timeout=_TOKEN_REDIS_TIMEOUT,
+        )
+    return _token_redis[loop]
+
+
+async def close_token_redis():
+    """Close the running loop's token cache redis; register it as a shutdown hook."""
+    redis = _token_redis.pop(asyncio.get_running_loop(), None)
+    if redis is not None:
+        await redis.aclose()
+
+
+def token_cache(key_builder=None, ttl: int = 60, leeway: int = 30):
+    """Cache an async access token getter until shortly before the token expires.
+
+    The expiry is read from the token's `exp` claim; tokens without one are
+    kept for `ttl` seconds. Concurrent misses share a single fetch. When
+    `token_cache_redis_uri` is set, tokens are also shared across workers
+    through Redis; Redis errors fall back to fetching locally.
+    """
+
+    if key_builder is None:
+
+        def key_builder(func, *args, **kwargs):
+            return func.__qualname__
+
+    def decorator(func):
+        tokens: dict[str, tuple[str, float]] = {}
+
+        def _expires_at(token: str) -> float:
+            exp = token_expiry(token)
+            return exp - leeway if exp else time.time() + ttl
+
+        async def load(key: str, *args, **kwargs) -> str | None:
+            redis = get_token_redis()
+            if redis is None:
+                return await func(*args, **kwargs)
+
+            redis_key = f"{Settings.project_name}:access_token:{key}"
+            try:
+                token = await redis.get(redis_key)
+                if token:
+                    return token.decode()
+            except Exception as e:
+                logging.warning(f"Token cache redis get failed: {e}")
+
+            token = await func(*args, **kwargs)
+            if token:
+                expires_in = int(_expires_at(token) - time.time())
+                try:
+                    if expires_in > 0:
+                        await redis.set(redis_key, token, ex=expires_in)
+                except Exception as e:
+                    logging.warning(f"Token cache redis set failed: {e}")
+            return token
+
+        fetch = single_flight(lambda _, key, *args, **kwargs: key)(load)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = key_builder(func, *args, **kwargs)
+            token, expires_at = tokens.get(key, (None, 0))
+            if token and time.time() < expires_at:
+                return token
+
+            token = await fetch(key, *args, **kwargs)
+            if token:
+                tokens[key] = (token, _expires_at(token))
+            return token
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,5 @@
 import uuid
-from typing import Literal
+from typing import Any, Literal, NamedTuple
 
 from fastapi import Request
 from fastapi_mongo_base.core.exceptions import BaseHTTPException
@@ -21,12 +21,25 @@ class AuthorizationData(BaseModel):
     scopes: list[str] | None = None
 
 
+class RequestContext(NamedTuple):
+    business: Business
+    user_id: Any = None
+
+
 async def get_business(
     request: Request,
 ) -> Business:
+    # request.state lives on the ASGI scope, so every dependency and handler
+    # of the same request shares the resolved business; the attribute is
+    # prefixed so an app's own request.state.business is never taken for it
+    business = getattr(request.state, "_ufaas_business", None)
+    if business:
+        return business
+
     business = await Business.get_by_origin(request.url.hostname)
     if not business:
         raise BaseHTTPException(404, "business_not_found", "business not found")
+    request.state._ufaas_business = business
     return business
 
 
@@ -46,6 +59,20 @@ async def get_request_body_dict(request: Request):
 async def authorization_middleware(
     request: Request, anonymous_accepted=False
 ) -> AuthorizationData:
+    authorizations: dict[bool, AuthorizationData] = getattr(
+        request.state, "_ufaas_authorizations", None
+    )
+    if authorizations is None:
+        authorizations = request.state._ufaas_authorizations = {}
+    if anonymous_accepted in authorizations:
+        return authorizations[anonymous_accepted]
+
+    authorization = await _authorize(request, anonymous_accepted)
+    authorizations[anonymous_accepted] = authorization
+    return authorization
+
+
+async def _authorize(request: Request, anonymous_accepted: bool) -> AuthorizationData:
     authorization = AuthorizationData()
 
     authorization.business = await get_business(request)
@@ -1,13 +1,16 @@
+import functools
+import hashlib
 import json
 import os
 import uuid
 
 from aiocache import cached
-from fastapi_mongo_base.utils.aionetwork import aio_request
 from fastapi_mongo_base.utils.basic import try_except_wrapper
+from pydantic import TypeAdapter
 from usso.session import AsyncUssoSession
 
-from .schemas import AppAuth, BusinessSchema, Config
+from .core.utils import aio_request, single_flight, token_cache
+from .schemas import AppAuth, BusinessSchema, default_config
 
 try:
     from server.config import Settings
@@ -15,6 +18,57 @@ except ImportError:
     from .core.config import Settings
 
 
+def _query_key_builder(func, cls, *args, **kwargs):
+    # None and missing params must map to the same key, and a UUID to the
+    # same key as its string form, otherwise equal queries miss the cache.
+    params = "&".join(f"{k}={v}" for k, v in sorted(kwargs.items()) if v is not None)
+    return f"{cls.__name__}:{params}"
+
+
+@functools.lru_cache(maxsize=16)
+def _fingerprint(*parts) -> str:
+    # identifies credentials in cache keys without exposing them
+    return hashlib.sha256("\0".join(map(str, parts)).encode()).hexdigest()[:16]
+
+
+def _app_credentials_id(sso_url: str, core_sso_url: str) -> str:
+    scopes = _fingerprint(getattr(Settings, "app_scopes", "[]"))
+    return f"app:{Settings.app_id}:{scopes}:{sso_url}|{core_sso_url}"
+
+
+def _cls_credentials_id(cls: type["Business"]) -> str:
+    # mirrors the branch cls_access_token takes to mint the token
+    refresh_url = cls.cls_refresh_url()
+    if os.getenv("USSO_ADMIN_API_KEY") and refresh_url:
+        return "admin:" + _fingerprint(
+            os.getenv("USSO_ADMIN_API_KEY"),
+            getattr(Settings, "USSO_USER_ID", None),
+            refresh_url,
+        )
+    if os.getenv("USSO_REFRESH_TOKEN") and refresh_url:
+        return "refresh:" + _fingerprint(os.getenv("USSO_REFRESH_TOKEN"), refresh_url)
+    core_sso_url = default_config().core_sso_url
+    return _app_credentials_id(core_sso_url, core_sso_url)
+
+
+def _cls_access_token_key(func, cls: type["Business"]):
+    return f"{func.__qualname__}:{_cls_credentials_id(cls)}"
+
+
+def _access_token_key(func, business: "Business"):
+    if hasattr(Settings, "app_id") and hasattr(Settings, "app_secret"):
+        config = business.config
+        credentials = _app_credentials_id(config.sso_url, config.core_sso_url)
+    else:
+        credentials = _cls_credentials_id(type(business))
+    return f"{func.__qualname__}:{credentials}"
+
+
+@functools.lru_cache
+def _list_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
 class Business(BusinessSchema):
     @property
     def root_url(self):
@@ -23,7 +77,8 @@ class Business(BusinessSchema):
         return f"https://{self.domain}"
 
     @classmethod
-    @cached(ttl=60 * 10)
+    @cached(ttl=60 * 10, key_builder=_query_key_builder)
+    @single_flight(key_builder=_query_key_builder)
     @try_except_wrapper
     async def _get_query(
         cls,
@@ -37,14 +92,14 @@ class Business(BusinessSchema):
         **kwargs,
     ):
         params = {"offset": offset, "limit": limit}
-        if user_id:
-            params["user_id"] = str(user_id)
-        if name:
-            params["name"] = name
-        if origin:
-            params["origin"] = origin
-        if uid:
-            params["uid"] = str(uid)
+        for key, value in (
+            ("user_id", user_id),
+            ("name", name),
+            ("origin", origin),
+            ("uid", uid),
+        ):
+            if value:
+                params[key] = str(value) if isinstance(value, uuid.UUID) else value
 
         access_token = await cls.cls_access_token()
         headers = {"Authorization": f"Bearer {access_token}"}
@@ -89,8 +144,7 @@ class Business(BusinessSchema):
         businesses_list = businesses_dict.get("items")
         if not businesses_list:
             return
-        business = cls(**businesses_list[0])
-        return business
+        return cls.model_validate(businesses_list[0])
 
     @classmethod
     async def get_by_origin(cls, origin: str):
@@ -118,7 +172,7 @@ class Business(BusinessSchema):
             *args,
             **kwargs,
         )
-        return [cls(**item) for item in business_dict.get("items", [])]
+        return _list_adapter(cls).validate_python(business_dict.get("items", []))
 
     @classmethod
     async def total_count(
@@ -146,16 +200,16 @@ class Business(BusinessSchema):
         *args,
         **kwargs,
     ) -> tuple[list["Business"], int]:
-        return await cls.list_items(
+        business_dict = await cls.get_query(
             user_id=user_id,
             offset=offset,
             limit=limit,
             is_deleted=is_deleted,
             *args,
             **kwargs,
-        ), await cls.total_count(
-            user_id=user_id, is_deleted=is_deleted, *args, **kwargs
         )
+        items = _list_adapter(cls).validate_python(business_dict.get("items", []))
+        return items, business_dict.get("total", 0)
 
     @classmethod
     async def get_item(cls, uid: uuid.UUID, user_id: uuid.UUID = None, *args, **kwargs):
@@ -163,11 +217,13 @@ class Business(BusinessSchema):
         businesses_list = business_dict.get("items", [])
         if not businesses_list:
             return
-        business = cls(**businesses_list[0])
-        return business
+        return cls.model_validate(businesses_list[0])
 
     @classmethod
-    @cached(ttl=getattr(Settings, "app_auth_expiry", 60))
+    @token_cache(
+        key_builder=_cls_access_token_key,
+        ttl=getattr(Settings, "app_auth_expiry", 60),
+    )
     async def cls_access_token(cls):
         if os.getenv("USSO_ADMIN_API_KEY") and cls.cls_refresh_url():
             client = AsyncUssoSession(
@@ -188,15 +244,16 @@ class Business(BusinessSchema):
 
         if hasattr(Settings, "app_id") and hasattr(Settings, "app_secret"):
             scopes = json.loads(getattr(Settings, "app_scopes", "[]"))
+            core_sso_url = default_config().core_sso_url
             app_auth = AppAuth(
                 app_id=Settings.app_id,
                 scopes=scopes,
-                sso_url=Config().core_sso_url,
+                sso_url=core_sso_url,
             )
             app_auth.secret = app_auth.get_secret(app_secret=Settings.app_secret)
 
             response_data: dict = await aio_request(
-                method="post", url=Config().core_sso_url, json=app_auth.model_dump()
+                method="post", url=core_sso_url, json=app_auth.model_dump()
             )
             return response_data.get("access_token")
 
@@ -204,7 +261,9 @@ class Business(BusinessSchema):
             "USSO_ADMIN_API_KEY or USSO_REFRESH_TOKEN or app_id/app_secret are not set in settings."
         )
 
-    @cached(ttl=getattr(Settings, "app_auth_expiry", 60))
+    @token_cache(
+        key_builder=_access_token_key, ttl=getattr(Settings, "app_auth_expiry", 60)
+    )
     async def get_access_token(self):
         if hasattr(Settings, "app_id") and hasattr(Settings, "app_secret"):
             scopes = json.loads(getattr(Settings, "app_scopes", "[]"))
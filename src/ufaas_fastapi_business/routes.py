@@ -1,16 +1,21 @@
+import asyncio
 import uuid
 from datetime import datetime
 from typing import Any, Literal, Type, TypeVar
 
-from fastapi import Depends, Query, Request
+from fastapi import Query, Request
 from fastapi_mongo_base.handlers import create_dto
-from fastapi_mongo_base.models import BusinessEntity
+from fastapi_mongo_base.models import BaseEntity, BusinessEntity
 from fastapi_mongo_base.routes import AbstractBaseRouter
-from fastapi_mongo_base.schemas import BusinessEntitySchema
+from fastapi_mongo_base.schemas import BusinessEntitySchema, PaginatedResponse
 
 from .core import exceptions
-from .middlewares import AuthorizationData, authorization_middleware, get_business
-from .models import Business
+from .middlewares import (
+    AuthorizationData,
+    RequestContext,
+    authorization_middleware,
+    get_business,
+)
 
 try:
     from server.config import Settings
@@ -18,28 +23,84 @@ except ImportError:
     from .core.config import Settings
 
 
+READ_METHODS = frozenset({"GET", "HEAD"})
+_MAX_LIMIT = Settings.page_max_limit
+
 T = TypeVar("T", bound=BusinessEntity)
 TS = TypeVar("TS", bound=BusinessEntitySchema)
 
 
+def _overrides_list_total_combined(model: type[BaseEntity]) -> bool:
+    return (
+        model.list_total_combined.__func__
+        is not BaseEntity.list_total_combined.__func__
+    )
+
+
 class AbstractBusinessBaseRouter(AbstractBaseRouter[T, TS]):
 
+    async def get_request_context(self, request: Request) -> RequestContext:
+        # business first, so an unknown business is reported before auth errors
+        business = await get_business(request)
+        user_id = await self.get_user_id(request)
+        return RequestContext(business=business, user_id=user_id)
+
+    async def _list_items(
+        self,
+        request: Request,
+        offset: int = 0,
+        limit: int = 10,
+        **kwargs,
+    ):
+        if "user_id" not in kwargs:
+            kwargs["user_id"] = await self.get_user_id(request)
+
+        if _overrides_list_total_combined(self.model):
+            items, total = await self.model.list_total_combined(
+                offset=offset, limit=limit, **kwargs
+            )
+        else:
+            # the default runs items and count one after the other; they are
+            # independent queries, so run them concurrently instead
+            items, total = await asyncio.gather(
+                self.model.list_items(offset=offset, limit=limit, **kwargs),
+                self.model.total_count(**kwargs),
+            )
+        # items are already validated documents: reuse them when they are
+        # instances of the list schema; otherwise validate a dict, which is
+        # what "before" validators in this package expect
+        schema = self.list_item_schema
+        items_in_schema = [
+            (
+                item
+                if isinstance(item, schema)
+                else schema.model_validate(item.model_dump())
+            )
+            for item in items
+        ]
+
+        return PaginatedResponse(
+            items=items_in_schema,
+            total=total,
+            offset=offset,
+            limit=limit,
+        )
+
     async def list_items(
         self,
         request: Request,
         offset: int = Query(0, ge=0),
-        limit: int = Query(10, ge=1, le=Settings.page_max_limit),
-        business: Business = Depends(get_business),
+        limit: int = Query(10, ge=1, le=_MAX_LIMIT),
         created_at_from: datetime | None = None,
         created_at_to: datetime | None = None,
     ):
-        user_id = await self.get_user_id(request)
+        context = await self.get_request_context(request)
         return await self._list_items(
             request=request,
             offset=offset,
             limit=limit,
-            user_id=user_id,
-            business_name=business.name,
+            user_id=context.user_id,
+            business_name=context.business.name,
             created_at_from=created_at_from,
             created_at_to=created_at_to,
         )
@@ -48,36 +109,35 @@ class AbstractBusinessBaseRouter(AbstractBaseRouter[T, TS]):
         self,
         request: Request,
         uid,
-        business: Business = Depends(get_business),
     ):
-        user_id = await self.get_user_id(request)
-        item = await self.get_item(uid, user_id=user_id, business_name=business.name)
+        context = await self.get_request_context(request)
+        item = await self.get_item(
+            uid, user_id=context.user_id, business_name=context.business.name
+        )
         return item
 
     async def create_item(
         self,
         request: Request,
         data: dict,
-        business: Business = Depends(get_business),
     ):
-        user_id = await self.get_user_id(request)
+        context = await self.get_request_context(request)
         item_data: TS = await create_dto(self.create_response_schema)(
-            request, user_id=user_id, business_name=business.name
+            request, user_id=context.user_id, business_name=context.business.name
         )
-        item = await self.model.create_item(item_data.model_dump())
-
-        await item.save()
-        return item
+        # create_item already inserts the document
+        return await self.model.create_item(item_data.model_dump())
 
     async def update_item(
         self,
         request: Request,
         uid,
         data: dict,
-        business: Business = Depends(get_business),
     ):
-        user_id = await self.get_user_id(request)
-        item = await self.get_item(uid, user_id=user_id, business_name=business.name)
+        context = await self.get_request_context(request)
+        item = await self.get_item(
+            uid, user_id=context.user_id, business_name=context.business.name
+        )
         # item = await update_dto(self.model)(request, user)
         item = await self.model.update_item(item, data)
         return item
@@ -86,10 +146,11 @@ class AbstractBusinessBaseRouter(AbstractBaseRouter[T, TS]):
         self,
         request: Request,
         uid,
-        business: Business = Depends(get_business),
     ):
-        user_id = await self.get_user_id(request)
-        item = await self.get_item(uid, user_id=user_id, business_name=business.name)
+        context = await self.get_request_context(request)
+        item = await self.get_item(
+            uid, user_id=context.user_id, business_name=context.business.name
+        )
         item = await self.model.delete_item(item)
         return item
 
@@ -118,49 +179,54 @@ class AbstractAuthRouter(AbstractBusinessBaseRouter[T, TS]):
             **kwargs,
         )
         self.auth_policy = auth_policy
+        # the policy is fixed per router, so resolve its check once
+        self._check_auth = {
+            "anonymous": self._check_anonymous,
+            "user": self._check_user,
+            "user_read": self._check_user_read,
+            "business": self._check_business,
+            "business_only": self._check_business_only,
+        }.get(auth_policy, self._check_user)
 
     async def get_auth(self, request: Request) -> AuthorizationData:
-        if self.auth_policy == "anonymous":
-            auth = await authorization_middleware(request, anonymous_accepted=True)
-            if request.method in ["GET", "HEAD"]:
-                return auth
+        auth = await authorization_middleware(
+            request, anonymous_accepted=self.auth_policy == "anonymous"
+        )
+        self._check_auth(auth, request)
+        return auth
+
+    def _check_anonymous(self, auth: AuthorizationData, request: Request):
+        if request.method not in READ_METHODS:
             raise exceptions.AuthorizationException(
                 f"Anonymous user cannot use {self.model.__name__} resource"
             )
 
-        auth = await authorization_middleware(request)
-
-        if self.auth_policy == "business_only":
-            if auth.issuer_type != "Business":
-                raise exceptions.AuthorizationException(
-                    f"User cannot use {self.model.__name__} resource"
-                )
-            return auth
-
-        if self.auth_policy == "business":
-            if auth.issuer_type == "User":
-                raise exceptions.AuthorizationException(
-                    f"User cannot use {self.model.__name__} resource"
-                )
+    def _check_user(self, auth: AuthorizationData, request: Request):
+        pass
 
-            return auth
-
-        if self.auth_policy == "user_read":
-            if auth.issuer_type != "User":
-                return auth
-            if request.method in ["GET", "HEAD"]:
-                return auth
+    def _check_user_read(self, auth: AuthorizationData, request: Request):
+        if auth.issuer_type == "User" and request.method not in READ_METHODS:
             raise exceptions.AuthorizationException(
                 f"User cannot write {self.model.__name__} resource"
             )
 
-        return auth
+    def _check_business(self, auth: AuthorizationData, request: Request):
+        if auth.issuer_type == "User":
+            raise exceptions.AuthorizationException(
+                f"User cannot use {self.model.__name__} resource"
+            )
+
+    def _check_business_only(self, auth: AuthorizationData, request: Request):
+        if auth.issuer_type != "Business":
+            raise exceptions.AuthorizationException(
+                f"User cannot use {self.model.__name__} resource"
+            )
 
     async def list_items(
         self,
         request: Request,
         offset: int = Query(0, ge=0),
-        limit: int = Query(10, ge=0, le=Settings.page_max_limit),
+        limit: int = Query(10, ge=1, le=_MAX_LIMIT),
         created_at_from: datetime | None = None,
         created_at_to: datetime | None = None,
     ):
@@ -184,11 +250,12 @@ class AbstractAuthRouter(AbstractBusinessBaseRouter[T, TS]):
 
     async def create_item(self, request: Request, data: dict):
         auth = await self.get_auth(request)
-        data.pop("user_id", None)
-        item = self.model(
-            business_name=auth.business.name,
-            user_id=auth.user_id if auth.user_id else auth.user.uid,
-            **data,
+        item = self.model.model_validate(
+            data
+            | {
+                "business_name": auth.business.name,
+                "user_id": auth.user_id if auth.user_id else auth.user.uid,
+            }
         )
         await item.save()
         return item  # self.create_response_schema(**item.model_dump())
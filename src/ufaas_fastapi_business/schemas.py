@@ -1,20 +1,30 @@
-import hashlib
+import functools
 import hmac
 import json
+import time
 import uuid
-from datetime import datetime
 from urllib.parse import urlparse
 
 from fastapi_mongo_base.schemas import OwnedEntitySchema
 from pydantic import BaseModel, Field, field_validator, model_validator
 from usso.core import JWTConfig
 
+from .core.app_auth import _scopes_digest, _secret_digest
+
 try:
     from server.config import Settings
 except ImportError:
     from .core.config import Settings
 
 
+APP_AUTH_EXPIRY = getattr(Settings, "app_auth_expiry", 60)
+
+
+@functools.lru_cache(maxsize=64)
+def _netloc(url: str) -> str:
+    return urlparse(url).netloc
+
+
 class Config(BaseModel):
     core_url: str = getattr(Settings, "core_url", "https://core.ufaas.io/")
     api_os_url: str = getattr(
@@ -30,8 +40,29 @@ class Config(BaseModel):
     default_currency: str = "IRR"
     wallet_id: uuid.UUID | None = None
 
+    @property
+    def core_netloc(self) -> str:
+        return _netloc(self.core_url)
+
     def __hash__(self):
-        return hash(self.model_dump_json())
+        # jwt_config is left out: it is unhashable and equal configs still
+        # hash equal without it
+        return hash(
+            (
+                self.core_url,
+                self.api_os_url,
+                self.sso_url,
+                self.core_sso_url,
+                tuple(self.allowed_origins),
+                self.default_currency,
+                self.wallet_id,
+            )
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def default_config() -> Config:
+    return Config()
 
 
 class BusinessSchema(OwnedEntitySchema):
@@ -45,12 +76,12 @@ class BusinessSchema(OwnedEntitySchema):
     @model_validator(mode="before")
     def validate_domain(cls, data: dict):
         if not data.get("domain"):
-            config = data.get("config", Config())
+            config = data.get("config") or default_config()
             if isinstance(config, dict):
                 config = Config(**config)
-            netloc = urlparse(config.core_url).netloc
-            business_name_domain = f"{data.get('name')}.{netloc}"
-            data["domain"] = business_name_domain
+            business_name_domain = f"{data.get('name')}.{config.core_netloc}"
+            # data may be a cached response payload, never write into it
+            return {**data, "domain": business_name_domain}
 
         return data
 
@@ -73,33 +104,25 @@ class AppAuth(BaseModel):
     # app_secret: str
     app_id: str
     scopes: list[str]
-    timestamp: int = Field(default_factory=lambda: int(datetime.now().timestamp()))
+    timestamp: int = Field(default_factory=lambda: int(time.time()))
     sso_url: str
     secret: str | None = None
 
     @field_validator("timestamp")
     def check_timestamp(cls, v: int):
-        if datetime.now().timestamp() - v > getattr(Settings, "app_auth_expiry", 60):
+        if time.time() - v > APP_AUTH_EXPIRY:
             raise ValueError("Timestamp expired.")
         return v
 
     @property
     def hash_key_part(self):
-        scopes_hash = hashlib.sha256("".join(self.scopes).encode()).hexdigest()
+        scopes_hash = _scopes_digest(tuple(self.scopes))
         return f"{self.app_id}{scopes_hash}{self.timestamp}{self.sso_url}"
 
     def check_secret(self, app_secret: bytes | str):
-        if type(app_secret) != str:
-            app_secret = app_secret.decode("utf-8")
-
-        key = f"{self.hash_key_part}{app_secret}"
         return hmac.compare_digest(
-            self.secret, hashlib.sha256(key.encode()).hexdigest()
+            self.secret, _secret_digest(self.hash_key_part, app_secret)
         )
 
     def get_secret(self, app_secret: bytes | str):
-        if type(app_secret) != str:
-            app_secret = app_secret.decode("utf-8")
-
-        key = f"{self.hash_key_part}{app_secret}"
-        return hashlib.sha256(key.encode()).hexdigest()
+        return _secret_digest(self.hash_key_part, app_secret)
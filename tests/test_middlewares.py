@@ -0,0 +1,69 @@
+import asyncio
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from ufaas_fastapi_business import middlewares
+
+
+def _request():
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(b"host", b"acme.example")],
+            "query_string": b"",
+        }
+    )
+
+
+def test_get_business_ignores_app_state_business(monkeypatch):
+    resolved = SimpleNamespace(name="acme")
+
+    async def get_by_origin(origin):
+        return resolved
+
+    monkeypatch.setattr(middlewares.Business, "get_by_origin", get_by_origin)
+    request = _request()
+    request.state.business = "set by another middleware"
+
+    assert asyncio.run(middlewares.get_business(request)) is resolved
+
+
+def test_authorization_is_decoded_once_per_request_and_mode(monkeypatch):
+    decoded = []
+
+    def jwt_access_security(request, jwt_config=None):
+        decoded.append(False)
+
+    def jwt_access_security_none(request, jwt_config=None):
+        decoded.append(True)
+
+    monkeypatch.setattr(middlewares, "jwt_access_security", jwt_access_security)
+    monkeypatch.setattr(
+        middlewares, "jwt_access_security_None", jwt_access_security_none
+    )
+    request = _request()
+    request.state._ufaas_business = SimpleNamespace(
+        config=SimpleNamespace(jwt_config=None), user_id=None
+    )
+
+    async def main():
+        return [
+            await middlewares.authorization_middleware(request),
+            await middlewares.authorization_middleware(request),
+            await middlewares.authorization_middleware(
+                request, anonymous_accepted=True
+            ),
+            await middlewares.authorization_middleware(
+                request, anonymous_accepted=True
+            ),
+        ]
+
+    strict, strict_again, anonymous, anonymous_again = asyncio.run(main())
+
+    assert strict is strict_again
+    assert anonymous is anonymous_again
+    assert strict is not anonymous
+    assert decoded == [False, True]
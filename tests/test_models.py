@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from ufaas_fastapi_business import models
+from ufaas_fastapi_business.core import utils
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+
+@pytest.fixture
+def shared_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(utils, "get_token_redis", lambda: redis)
+    for name in ("USSO_ADMIN_API_KEY", "USSO_REFRESH_TOKEN"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(models.Settings, "app_secret", "secret", raising=False)
+    return redis
+
+
+def _issue_tokens(monkeypatch):
+    async def fake_request(*, method="get", url=None, json=None, **kwargs):
+        return {"access_token": f"token-{json['app_id']}-{','.join(json['scopes'])}"}
+
+    monkeypatch.setattr(models, "aio_request", fake_request)
+
+
+def _use_app(monkeypatch, app_id, scopes):
+    monkeypatch.setattr(models.Settings, "app_id", app_id, raising=False)
+    monkeypatch.setattr(models.Settings, "app_scopes", scopes, raising=False)
+
+
+def test_cls_access_token_apps_do_not_share_redis_keys(monkeypatch, shared_redis):
+    _issue_tokens(monkeypatch)
+
+    _use_app(monkeypatch, "app-a", '["read"]')
+    token_a = asyncio.run(models.Business.cls_access_token())
+    _use_app(monkeypatch, "app-b", '["read"]')
+    token_b = asyncio.run(models.Business.cls_access_token())
+
+    assert token_a == "token-app-a-read"
+    assert token_b == "token-app-b-read"
+    assert len(shared_redis.data) == 2
+
+
+def test_cls_access_token_scopes_do_not_share_redis_keys(monkeypatch, shared_redis):
+    _issue_tokens(monkeypatch)
+
+    _use_app(monkeypatch, "app-c", '["read"]')
+    token_read = asyncio.run(models.Business.cls_access_token())
+    _use_app(monkeypatch, "app-c", '["admin"]')
+    token_admin = asyncio.run(models.Business.cls_access_token())
+
+    assert token_read == "token-app-c-read"
+    assert token_admin == "token-app-c-admin"
+    assert len(shared_redis.data) == 2
+
+
+def test_credentials_id_depends_on_minting_branch(monkeypatch):
+    _use_app(monkeypatch, "app-d", '["read"]')
+    monkeypatch.setattr(
+        models.Business, "cls_refresh_url", classmethod(lambda cls: "https://sso/r")
+    )
+    monkeypatch.delenv("USSO_ADMIN_API_KEY", raising=False)
+    monkeypatch.delenv("USSO_REFRESH_TOKEN", raising=False)
+    app_id = models._cls_credentials_id(models.Business)
+
+    monkeypatch.setenv("USSO_REFRESH_TOKEN", "refresh-1")
+    refresh_1 = models._cls_credentials_id(models.Business)
+    monkeypatch.setenv("USSO_REFRESH_TOKEN", "refresh-2")
+    refresh_2 = models._cls_credentials_id(models.Business)
+
+    monkeypatch.setenv("USSO_ADMIN_API_KEY", "admin-key")
+    admin = models._cls_credentials_id(models.Business)
+
+    assert len({app_id, refresh_1, refresh_2, admin}) == 4
+    assert "refresh-1" not in refresh_1
+    assert "admin-key" not in admin
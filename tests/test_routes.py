@@ -0,0 +1,168 @@
+import asyncio
+from types import SimpleNamespace
+from typing import ClassVar
+
+import pytest
+from fastapi_mongo_base.core.exceptions import BaseHTTPException
+from fastapi_mongo_base.models import BusinessEntity
+from fastapi_mongo_base.schemas import BusinessEntitySchema
+from pydantic import model_validator
+from starlette.requests import Request
+
+from ufaas_fastapi_business import routes
+from ufaas_fastapi_business.core.exceptions import AuthorizationException
+from ufaas_fastapi_business.middlewares import AuthorizationData
+from ufaas_fastapi_business.routes import AbstractBusinessBaseRouter
+
+
+class Item(BusinessEntitySchema):
+    pass
+
+
+class SplitQueries(BusinessEntity):
+    calls: ClassVar[list[str]] = []
+
+    @classmethod
+    async def list_items(cls, offset=0, limit=10, **kwargs):
+        cls.calls.append("list_items")
+        return []
+
+    @classmethod
+    async def total_count(cls, **kwargs):
+        cls.calls.append("total_count")
+        return 3
+
+
+class CombinedQuery(SplitQueries):
+    calls: ClassVar[list[str]] = []
+
+    @classmethod
+    async def list_total_combined(cls, offset=0, limit=10, **kwargs):
+        cls.calls.append("list_total_combined")
+        return [], 7
+
+
+def _list_items(model):
+    router = SimpleNamespace(model=model, list_item_schema=Item)
+    return asyncio.run(
+        AbstractBusinessBaseRouter._list_items(
+            router, request=None, offset=0, limit=5, user_id=None
+        )
+    )
+
+
+def test_list_items_runs_split_queries_by_default():
+    response = _list_items(SplitQueries)
+
+    assert response.total == 3
+    assert sorted(SplitQueries.calls) == ["list_items", "total_count"]
+
+
+def test_list_items_uses_overridden_list_total_combined():
+    response = _list_items(CombinedQuery)
+
+    assert response.total == 7
+    assert CombinedQuery.calls == ["list_total_combined"]
+
+
+def test_request_context_resolves_business_before_user(monkeypatch):
+    async def missing_business(request):
+        raise BaseHTTPException(404, "business_not_found", "business not found")
+
+    async def get_user_id(request):
+        raise AssertionError("user lookup must not start")
+
+    monkeypatch.setattr(routes, "get_business", missing_business)
+    router = SimpleNamespace(get_user_id=get_user_id)
+    with pytest.raises(BaseHTTPException) as error:
+        asyncio.run(AbstractBusinessBaseRouter.get_request_context(router, None))
+
+    assert error.value.status_code == 404
+
+
+def test_request_context_keeps_user_id_as_is(monkeypatch):
+    business = object()
+
+    async def get_business(request):
+        return business
+
+    async def get_user_id(request):
+        return "not-a-uuid"
+
+    monkeypatch.setattr(routes, "get_business", get_business)
+    router = SimpleNamespace(get_user_id=get_user_id)
+    context = asyncio.run(AbstractBusinessBaseRouter.get_request_context(router, None))
+
+    assert context.business is business
+    assert context.user_id == "not-a-uuid"
+
+
+class TitledItem(BusinessEntitySchema):
+    title: str | None = None
+
+    @model_validator(mode="before")
+    def default_title(cls, data: dict):
+        if not data.get("title"):
+            data["title"] = "untitled"
+        return data
+
+
+class TitledDocument(BusinessEntity):
+    title: str | None = None
+
+
+def test_list_items_runs_before_validators_on_dicts():
+    class Titled(SplitQueries):
+        @classmethod
+        async def list_items(cls, offset=0, limit=10, **kwargs):
+            return [TitledDocument.model_construct(business_name="acme", title=None)]
+
+    router = SimpleNamespace(model=Titled, list_item_schema=TitledItem)
+    response = asyncio.run(
+        AbstractBusinessBaseRouter._list_items(
+            router, request=None, offset=0, limit=5, user_id=None
+        )
+    )
+
+    assert [item.title for item in response.items] == ["untitled"]
+
+
+ISSUERS = ["User", "Business", "App", "Anonymous"]
+# (method, issuer) pairs each policy rejects, as in the original get_auth
+REJECTED = {
+    "anonymous": {("POST", issuer) for issuer in ISSUERS},
+    "user": set(),
+    "user_read": {("POST", "User")},
+    "business": {("GET", "User"), ("POST", "User")},
+    "business_only": {
+        (method, issuer)
+        for method in ("GET", "POST")
+        for issuer in ISSUERS
+        if issuer != "Business"
+    },
+}
+
+
+@pytest.mark.parametrize("issuer_type", ISSUERS)
+@pytest.mark.parametrize("method", ["GET", "POST"])
+@pytest.mark.parametrize("policy", list(REJECTED))
+def test_auth_policy(monkeypatch, policy, method, issuer_type):
+    auth = AuthorizationData(issuer_type=issuer_type)
+    accepted = []
+
+    async def authorization_middleware(request, anonymous_accepted=False):
+        accepted.append(anonymous_accepted)
+        return auth
+
+    monkeypatch.setattr(routes, "authorization_middleware", authorization_middleware)
+    # routers are singletons per class, so each policy needs its own class
+    router_class = type(f"{policy}Router", (routes.AbstractAuthRouter,), {})
+    router = router_class(SplitQueries, schema=Item, auth_policy=policy)
+    request = Request({"type": "http", "method": method, "headers": []})
+
+    if (method, issuer_type) in REJECTED[policy]:
+        with pytest.raises(AuthorizationException):
+            asyncio.run(router.get_auth(request))
+    else:
+        assert asyncio.run(router.get_auth(request)) is auth
+    assert accepted == [policy == "anonymous"]
@@ -0,0 +1,20 @@
+from ufaas_fastapi_business.schemas import BusinessSchema, default_config
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def test_business_config_default_is_not_the_shared_default_config(monkeypatch):
+    business = BusinessSchema(name="acme", user_id=USER_ID)
+    sso_url = default_config().core_sso_url
+    monkeypatch.setattr(business.config, "core_sso_url", "https://other-sso/access")
+
+    assert business.config is not default_config()
+    assert default_config().core_sso_url == sso_url
+
+
+def test_validate_domain_does_not_mutate_input():
+    data = {"name": "acme", "user_id": USER_ID}
+    business = BusinessSchema.model_validate(data)
+
+    assert business.domain == f"acme.{default_config().core_netloc}"
+    assert "domain" not in data
@@ -0,0 +1,52 @@
+import asyncio
+from types import SimpleNamespace
+
+import jwt
+import pytest
+
+from ufaas_fastapi_business.core import utils
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(utils, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def _counting_token_getter(token_for, **cache_kwargs):
+    calls = []
+
+    @utils.token_cache(**cache_kwargs)
+    async def get_token():
+        calls.append(1)
+        return token_for(len(calls))
+
+    return get_token, calls
+
+
+def test_token_cache_expires_at_exp_minus_leeway(clock):
+    exp = clock.value + 100
+
+    def token_for(n):
+        return jwt.encode({"exp": exp, "n": n}, "k" * 32, algorithm="HS256")
+
+    get_token, calls = _counting_token_getter(token_for, ttl=1000, leeway=30)
+
+    first = asyncio.run(get_token())
+    clock.value = exp - 31
+    assert asyncio.run(get_token()) == first
+    clock.value = exp - 30
+    assert asyncio.run(get_token()) != first
+    assert len(calls) == 2
+
+
+def test_token_cache_uses_ttl_without_exp(clock):
+    get_token, calls = _counting_token_getter(lambda n: f"opaque-{n}", ttl=60)
+
+    assert asyncio.run(get_token()) == "opaque-1"
+    clock.value += 59
+    assert asyncio.run(get_token()) == "opaque-1"
+    clock.value += 1
+    assert asyncio.run(get_token()) == "opaque-2"
+    assert len(calls) == 2
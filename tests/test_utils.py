@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from ufaas_fastapi_business.core import utils
+
+
+def _by_arg(func, key):
+    return key
+
+
+def test_single_flight_shares_one_call():
+    calls = []
+
+    @utils.single_flight(key_builder=_by_arg)
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"value-{key}"
+
+    async def main():
+        return await asyncio.gather(fetch("a"), fetch("a"), fetch("a"), fetch("b"))
+
+    assert asyncio.run(main()) == ["value-a", "value-a", "value-a", "value-b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_single_flight_raises_for_all_waiters_and_clears_entry():
+    calls = []
+
+    @utils.single_flight(key_builder=_by_arg)
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise ValueError("boom")
+        return "ok"
+
+    async def main():
+        results = await asyncio.gather(fetch("a"), fetch("a"), return_exceptions=True)
+        return results, await fetch("a")
+
+    (first, second), retried = asyncio.run(main())
+
+    assert isinstance(first, ValueError) and isinstance(second, ValueError)
+    assert retried == "ok"
+    assert calls == ["a", "a"]
+
+
+def test_single_flight_cancelled_caller_does_not_cancel_others():
+    calls = []
+
+    @utils.single_flight(key_builder=_by_arg)
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        cancelled = asyncio.create_task(fetch("a"))
+        waiting = asyncio.create_task(fetch("a"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await waiting
+
+    assert asyncio.run(main()) == "ok"
+    assert calls == ["a"]
+
+
+def test_token_redis_fails_fast_and_closes(monkeypatch):
+    pytest.importorskip("redis")
+    monkeypatch.setattr(
+        utils.Settings, "token_cache_redis_uri", "redis://10.255.255.1:6379/0"
+    )
+
+    async def main():
+        redis = utils.get_token_redis()
+        assert utils.get_token_redis() is redis
+        await utils.close_token_redis()
+        return redis, utils.get_token_redis()
+
+    redis, reopened = asyncio.run(main())
+    options = redis.connection_pool.connection_kwargs
+
+    assert options["socket_connect_timeout"] == utils._TOKEN_REDIS_TIMEOUT
+    assert options["socket_timeout"] == utils._TOKEN_REDIS_TIMEOUT
+    assert reopened is not redis